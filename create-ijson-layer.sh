@@ -0,0 +1,19 @@
+#!/bin/bash
+
+# Script to create a Lambda layer with ijson for streaming large transcripts
+
+# Ensure the directory structure exists
+mkdir -p layers/ijson/python
+
+# Install the Lambda-compatible ijson wheel directly to the layer directory
+echo "Installing ijson version 3.3.0 to Lambda layer..."
+pip install ijson==3.3.0 -t layers/ijson/python/ \
+    --platform manylinux2014_x86_64 --python-version 3.9 --only-binary=:all:
+
+# Remove unnecessary files to reduce layer size
+echo "Cleaning up unnecessary files..."
+find layers/ijson/python -name "*.dist-info" -type d -exec rm -rf {} +
+find layers/ijson/python -name "__pycache__" -type d -exec rm -rf {} +
+
+echo "Lambda layer created successfully at layers/ijson/"
+echo "You can now deploy your CDK stack with the ijson layer."
@@ -0,0 +1,19 @@
+#!/bin/bash
+
+# Script to create a Lambda layer with orjson for fast JSON parsing of transcripts
+
+# Ensure the directory structure exists
+mkdir -p layers/orjson/python
+
+# Install the Lambda-compatible orjson wheel directly to the layer directory
+echo "Installing orjson version 3.10.18 to Lambda layer..."
+pip install orjson==3.10.18 -t layers/orjson/python/ \
+    --platform manylinux2014_x86_64 --python-version 3.9 --only-binary=:all:
+
+# Remove unnecessary files to reduce layer size
+echo "Cleaning up unnecessary files..."
+find layers/orjson/python -name "*.dist-info" -type d -exec rm -rf {} +
+find layers/orjson/python -name "__pycache__" -type d -exec rm -rf {} +
+
+echo "Lambda layer created successfully at layers/orjson/"
+echo "You can now deploy your CDK stack with the orjson layer."
@@ -0,0 +1,68 @@
+import json
+
+def format_segments(segments, max_length=None):
+    """
+    Format timestamped transcript segments as "[MM:SS] text" paragraphs.
+    
+    Args:
+        segments: Iterable of BDA transcript segments
+        max_length: Stop once the result is longer than this many characters,
+            or None to format every segment
+        
+    Returns:
+        String containing the formatted transcript
+    """
+    parts = []
+    transcript_length = 0
+    for segment in segments:
+        # Format timestamp as [MM:SS]
+        minutes, seconds = divmod(int(segment.get('startTime', 0)), 60)
+        part = "[%02d:%02d] %s\n\n" % (minutes, seconds, segment.get('text', ''))
+        parts.append(part)
+        if max_length is not None:
+            transcript_length += len(part)
+            if transcript_length > max_length:
+                break
+    return "".join(parts)
+
+def extract_transcript(transcript_data, max_length=None):
+    """
+    Extract the transcript text from parsed Bedrock Data Automation output.
+    
+    Args:
+        transcript_data: Parsed transcript JSON
+        max_length: Passed to format_segments to stop formatting early
+        
+    Returns:
+        String containing the transcript
+    """
+    transcript = ""
+    
+    if isinstance(transcript_data, dict):
+        # The Bedrock Data Automation output format should contain the text extraction
+        # in the audio section of standardOutput
+        text_data = None
+        try:
+            text_data = transcript_data['standardOutput']['audio']['extraction']['text']
+            segments = text_data['segments']
+        except (KeyError, TypeError):
+            # No timestamped segments, use the full content if present
+            if isinstance(text_data, dict):
+                transcript = text_data.get('content', '')
+        else:
+            transcript = format_segments(segments, max_length)
+        
+        # If we couldn't find the transcript in the expected structure, try common patterns
+        if not transcript:
+            for field in ('text', 'transcript', 'content'):
+                if field in transcript_data:
+                    transcript = transcript_data[field]
+                    break
+    
+    # Last resort fallback
+    if not transcript:
+        print("Could not find transcript in expected format, using raw JSON")
+        transcript = json.dumps(transcript_data, indent=2)
+        print(f"Using raw transcript data as fallback: {transcript[:100]}...")
+    
+    return transcript
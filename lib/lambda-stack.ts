@@ -18,6 +18,27 @@ export class LambdaStack extends cdk.Stack {
   constructor(scope: Construct, id: string, props: LambdaStackProps) {
     super(scope, id, props);
 
+    // Create a Lambda layer with orjson for fast transcript JSON handling
+    const orjsonLayer = new lambda.LayerVersion(this, 'OrjsonLayer', {
+      code: lambda.Code.fromAsset('layers/orjson'),
+      compatibleRuntimes: [lambda.Runtime.PYTHON_3_9],
+      description: 'orjson for fast JSON parsing and serialization of transcripts',
+    });
+
+    // Create a Lambda layer with ijson for streaming large transcripts
+    const ijsonLayer = new lambda.LayerVersion(this, 'IjsonLayer', {
+      code: lambda.Code.fromAsset('layers/ijson'),
+      compatibleRuntimes: [lambda.Runtime.PYTHON_3_9],
+      description: 'ijson for streaming timestamped segments out of large transcripts',
+    });
+
+    // Create a Lambda layer with the transcript parsing code shared by the functions
+    const commonLayer = new lambda.LayerVersion(this, 'CommonLayer', {
+      code: lambda.Code.fromAsset('layers/common'),
+      compatibleRuntimes: [lambda.Runtime.PYTHON_3_9],
+      description: 'Shared Bedrock Data Automation transcript parsing',
+    });
+
     // Create Lambda functions
     this.transcriptProcessorFunction = new lambda.Function(this, 'TranscriptProcessor', {
       runtime: lambda.Runtime.PYTHON_3_9,
@@ -28,6 +49,7 @@ export class LambdaStack extends cdk.Stack {
       },
       timeout: cdk.Duration.seconds(30),
       memorySize: 256,
+      layers: [commonLayer, orjsonLayer, ijsonLayer], // Add the shared code and the layers with orjson and ijson
     });
 
     this.summarizerFunction = new lambda.Function(this, 'Summarizer', {
@@ -39,6 +61,7 @@ export class LambdaStack extends cdk.Stack {
       },
       timeout: cdk.Duration.minutes(5), // Longer timeout for Bedrock API calls
       memorySize: 512,
+      layers: [commonLayer, orjsonLayer, ijsonLayer], // Add the shared code and the layers with orjson and ijson
     });
 
     this.formatterFunction = new lambda.Function(this, 'Formatter', {
@@ -108,7 +108,8 @@ export class StepFunctionsStack extends cdk.Stack {
     // Allow Lambda to access S3 buckets
     props.transcriptsBucket.grantReadWrite(bedrockTranscribeFunction);
     props.transcriptsBucket.grantReadWrite(bedrockStatusFunction);
-    props.transcriptsBucket.grantRead(props.summarizerFunction); // Allow summarizer to read transcripts from S3
+    props.transcriptsBucket.grantReadWrite(props.summarizerFunction); // Allow summarizer to read transcripts and store oversized summaries
+    props.transcriptsBucket.grantRead(props.formatterFunction); // Allow formatter to read oversized summaries
     if (props.inputBucket) {
       props.inputBucket.grantReadWrite(bedrockTranscribeFunction); // Changed from grantRead to grantReadWrite
     }
@@ -133,11 +134,17 @@ export class StepFunctionsStack extends cdk.Stack {
       time: sfn.WaitTime.duration(cdk.Duration.seconds(30))
     });
 
+    // Wait between subsequent status checks, backing off as the job runs longer
+    const waitBeforeNextPoll = new sfn.Wait(this, 'WaitBeforeNextPoll', {
+      time: sfn.WaitTime.secondsPath('$.TranscriptionStatus.Payload.NextPollSeconds')
+    });
+
     // 3. Check transcription status via Lambda
     const checkTranscriptionStatus = new tasks.LambdaInvoke(this, 'CheckTranscriptionStatus', {
       lambdaFunction: bedrockStatusFunction,
       payload: sfn.TaskInput.fromObject({
-        JobId: sfn.JsonPath.stringAt('$.TranscriptionJob.Payload.JobId')
+        JobId: sfn.JsonPath.stringAt('$.TranscriptionJob.Payload.JobId'),
+        StartTime: sfn.JsonPath.stringAt('$$.Execution.StartTime')
       }),
       resultPath: '$.TranscriptionStatus',
       retryOnServiceExceptions: true,
@@ -205,6 +212,7 @@ export class StepFunctionsStack extends cdk.Stack {
       // Extract only the specific fields needed from the Lambda response
       resultSelector: {
         'summary.$': '$.Payload.summary',
+        'summary_s3.$': '$.Payload.summary_s3',
         'metadata.$': '$.Payload.essential_metadata'
       },
       // Add outputPath to strictly filter what gets stored in the state machine
@@ -217,6 +225,7 @@ export class StepFunctionsStack extends cdk.Stack {
     const filterSummaryResult = new sfn.Pass(this, 'FilterSummaryResult', {
       parameters: {
         'summary.$': '$.SummaryResult.summary',
+        'summary_s3.$': '$.SummaryResult.summary_s3',
         'metadata.$': '$.SummaryResult.metadata'
       },
       resultPath: '$.FilteredSummary'
@@ -228,6 +237,7 @@ export class StepFunctionsStack extends cdk.Stack {
       // Removed inputPath: '$' to prevent passing the entire state object
       payload: sfn.TaskInput.fromObject({
         summary: sfn.JsonPath.stringAt('$.FilteredSummary.summary'),
+        summary_s3: sfn.JsonPath.stringAt('$.FilteredSummary.summary_s3'),
         metadata: sfn.JsonPath.stringAt('$.FilteredSummary.metadata')
       }),
       retryOnServiceExceptions: true,
@@ -255,7 +265,7 @@ export class StepFunctionsStack extends cdk.Stack {
         sfn.Condition.stringEquals('$.TranscriptionStatus.Payload.Status', 'SUCCESS')
       ), processTranscript)
       .when(sfn.Condition.stringEquals('$.TranscriptionStatus.Payload.Status', 'FAILED'), transcriptionFailed)
-      .otherwise(waitForTranscription);
+      .otherwise(waitBeforeNextPoll);
 
     // Chain the initial steps together
     const definition = transcribeAudio
@@ -263,6 +273,9 @@ export class StepFunctionsStack extends cdk.Stack {
       .next(checkTranscriptionStatus)
       .next(isTranscriptionComplete);
 
+    // Loop back to the status check after backing off
+    waitBeforeNextPoll.next(checkTranscriptionStatus);
+
     // Create the state machine
     this.stateMachine = new sfn.StateMachine(this, 'PodcastProcessingStateMachine', {
       definition,
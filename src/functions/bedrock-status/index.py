@@ -1,27 +1,73 @@
 import boto3
 import json
+import os
 import re
+from datetime import datetime, timezone
+from botocore.config import Config
 
-# Print boto3 version for debugging
-print(f"boto3 version: {boto3.__version__}")
+# Print boto3 version for debugging when DEBUG_INIT is set
+if os.environ.get('DEBUG_INIT'):
+    print(f"boto3 version: {boto3.__version__}")
+
+# Shared client configuration: keep connections alive between warm invocations
+# and fail fast on connect
+CLIENT_CONFIG = Config(
+    tcp_keepalive=True,
+    connect_timeout=3,
+    retries={'max_attempts': 3, 'mode': 'adaptive'}
+)
+
+# Set DEBUG_EVENT to log full incoming events
+DEBUG_EVENT = os.environ.get('DEBUG_EVENT')
+
+# Create the runtime client once so it is reused across warm invocations
+client = boto3.client('bedrock-data-automation-runtime', config=CLIENT_CONFIG)
+
+# Regex pattern compiled once at import time
+UUID_PATTERN = re.compile(r'([a-f0-9]{8}-[a-f0-9]{4}-[a-f0-9]{4}-[a-f0-9]{4}-[a-f0-9]{12})')
 
 def extract_s3_path(s3_uri):
     """
     Extract bucket and key from S3 URI
     """
-    match = re.match(r's3://([^/]+)/(.+)', s3_uri)
-    if match:
-        return match.group(1), match.group(2)
+    if not s3_uri.startswith('s3://'):
+        return None, None
+    bucket, _, key = s3_uri[5:].partition('/')
+    if bucket and key:
+        return bucket, key
     return None, None
 
+# Locations of the output URI in the status response, in order of preference:
+# the standard result path, then outputConfiguration (as seen in CLI output)
+OUTPUT_URI_PATHS = (("result", "outputS3Uri"), ("outputConfiguration", "s3Uri"))
+
+# Bounds for the wait between status checks, which backs off as the job runs longer.
+# The minimum matches the fixed 30 second interval, so backing off never polls more often
+MIN_POLL_SECONDS = 30
+MAX_POLL_SECONDS = 120
+
+def get_next_poll_seconds(response, start_time):
+    """
+    Compute how long Step Functions should wait before the next status check
+    
+    Uses the job creation time from the status response if present, otherwise
+    the execution start time passed in the event.
+    """
+    started = response.get('creationTime') or start_time
+    try:
+        if isinstance(started, str):
+            started = datetime.fromisoformat(started.replace('Z', '+00:00'))
+        elapsed_seconds = (datetime.now(timezone.utc) - started).total_seconds()
+    except (TypeError, ValueError):
+        return MIN_POLL_SECONDS
+    return int(min(MAX_POLL_SECONDS, max(MIN_POLL_SECONDS, elapsed_seconds // 4)))
+
 def handler(event, context):
     """
     Lambda function to check Bedrock Data Automation job status
     """
-    # Use the runtime client for status checking
-    client = boto3.client('bedrock-data-automation-runtime')
-    
-    print(f"Event received: {json.dumps(event)}")
+    if DEBUG_EVENT:
+        print(f"Event received: {json.dumps(event)}")
     
     try:
         # Get invocation ARN from the event
@@ -49,6 +95,7 @@ def handler(event, context):
         result = {
             "JobId": invocation_arn,
             "Status": status,
+            "NextPollSeconds": get_next_poll_seconds(response, event.get('StartTime')),
         }
         
         # Include output information if job is completed (check both "COMPLETED" and "SUCCESS")
@@ -56,15 +103,11 @@ def handler(event, context):
             print(f"Job completed with status: {raw_status}")
             
             # The output path can be in different locations based on response structure
-            output_uri = None
-            
-            # Check standard result path
-            if "result" in response and "outputS3Uri" in response["result"]:
-                output_uri = response["result"]["outputS3Uri"]
-            
-            # Check outputConfiguration path (from CLI output)
-            elif "outputConfiguration" in response and "s3Uri" in response["outputConfiguration"]:
-                output_uri = response["outputConfiguration"]["s3Uri"]
+            output_uri = next(
+                (response[section][field] for section, field in OUTPUT_URI_PATHS
+                 if isinstance(response.get(section), dict) and field in response[section]),
+                None
+            )
                 
             if output_uri:
                 print(f"Found output URI: {output_uri}")
@@ -79,9 +122,7 @@ def handler(event, context):
                     # If we found a metadata file, try to find the actual transcript
                     if key.endswith("job_metadata.json"):
                         # Use a more robust method: extract the UUID pattern from the path
-                        import re
-                        uuid_pattern = re.compile(r'([a-f0-9]{8}-[a-f0-9]{4}-[a-f0-9]{4}-[a-f0-9]{4}-[a-f0-9]{12})')
-                        match = uuid_pattern.search(key)
+                        match = UUID_PATTERN.search(key)
                         
                         if match:
                             # Extract job ID from UUID pattern
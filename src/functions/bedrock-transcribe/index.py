@@ -1,10 +1,34 @@
 import boto3
 import json
 import os
-import uuid
+import string
+import urllib.parse
+from botocore.config import Config
 
-# Print boto3 version for debugging
-print(f"boto3 version: {boto3.__version__}")
+# Print boto3 version for debugging when DEBUG_INIT is set
+if os.environ.get('DEBUG_INIT'):
+    print(f"boto3 version: {boto3.__version__}")
+
+# Shared client configuration: keep connections alive between warm invocations
+# and fail fast on connect
+CLIENT_CONFIG = Config(
+    tcp_keepalive=True,
+    connect_timeout=3,
+    retries={'max_attempts': 3, 'mode': 'adaptive'}
+)
+
+# Create the runtime client once so it is reused across warm invocations
+client_runtime = boto3.client('bedrock-data-automation-runtime', config=CLIENT_CONFIG)
+
+# Characters urllib.parse.quote leaves untouched in S3 keys, so keys made up
+# only of these can skip encoding entirely
+SAFE_KEY_CHARS = frozenset(string.ascii_letters + string.digits + '_.-~/')
+
+# AWS region is resolved once during init
+REGION_NAME = boto3.session.Session().region_name or os.environ.get('AWS_REGION', 'us-west-2')
+
+# Account ID is resolved on first use and cached for subsequent invocations
+_account_id = None
 
 def get_project_arn():
     """
@@ -17,28 +41,29 @@ def get_project_arn():
     print(f"Using data automation project ARN: {project_arn}")
     return project_arn
 
-def get_profile_arn():
+def get_profile_arn(context=None):
     """
     Dynamically construct the data automation profile ARN
     """
-    # Get AWS region
-    session = boto3.session.Session()
-    region_name = session.region_name or 'us-west-2'
+    region_name = REGION_NAME
     
-    # Get account ID using Lambda context or STS
-    account_id = None
-    try:
-        # Try to extract account ID from Lambda context if available
-        if 'context' in globals() and hasattr(globals()['context'], 'invoked_function_arn'):
-            account_id = globals()['context'].invoked_function_arn.split(':')[4]
-        else:
-            # Fall back to STS if context is not available
-            sts_client = boto3.client('sts')
-            account_id = sts_client.get_caller_identity()['Account']
-    except Exception as e:
-        print(f"Error getting account ID: {str(e)}")
-        # Provide a fallback mechanism for testing
-        account_id = os.environ.get('AWS_ACCOUNT_ID', '123456789012')
+    # Get account ID using Lambda context or STS, reusing the cached value on warm starts
+    global _account_id
+    account_id = _account_id
+    if not account_id:
+        try:
+            # Try to extract account ID from Lambda context if available
+            if context is not None and hasattr(context, 'invoked_function_arn'):
+                account_id = context.invoked_function_arn.split(':')[4]
+            else:
+                # Fall back to STS if context is not available
+                sts_client = boto3.client('sts', config=CLIENT_CONFIG)
+                account_id = sts_client.get_caller_identity()['Account']
+            _account_id = account_id
+        except Exception as e:
+            print(f"Error getting account ID: {str(e)}")
+            # Provide a fallback mechanism for testing
+            account_id = os.environ.get('AWS_ACCOUNT_ID', '123456789012')
     
     # Construct the profile ARN
     profile_arn = f'arn:aws:bedrock:{region_name}:{account_id}:data-automation-profile/us.data-automation-v1'
@@ -51,16 +76,12 @@ def handler(event, context):
     """
     Lambda function to invoke Bedrock Data Automation transcription
     """
-    # Create separate clients for different API endpoints
-    client_data_automation = boto3.client('bedrock-data-automation')
-    client_runtime = boto3.client('bedrock-data-automation-runtime')
-    
     try:
         # Get the project ARN from environment variable
         project_arn = get_project_arn()
         
         # Get the profile ARN for cross-region inference
-        profile_arn = get_profile_arn()
+        profile_arn = get_profile_arn(context)
         
         # Extract parameters from the Step Functions event
         model_id = event.get('ModelId', 'amazon.titan-tg1-large')
@@ -81,8 +102,10 @@ def handler(event, context):
             key = event['key'].replace(' ', '_')  # Replace spaces
             
             # URL encode special characters in the key
-            import urllib.parse
-            encoded_key = urllib.parse.quote(key)
+            if SAFE_KEY_CHARS.issuperset(key):
+                encoded_key = key
+            else:
+                encoded_key = urllib.parse.quote(key)
             
             input_uri = f"s3://{input_bucket}/{encoded_key}"
             print(f"Constructed S3 URI: {input_uri}")
@@ -111,8 +134,8 @@ def handler(event, context):
         output_uri = f"s3://{output_bucket}/transcripts/"
         print(f"Output S3 URI: {output_uri}")
             
-        # Generate a unique client token for idempotency
-        client_token = str(uuid.uuid4())
+        # Use the Lambda request ID (already a UUID) as the client token for idempotency
+        client_token = context.aws_request_id
         
         print(f"Invoking Data Automation Async for file {input_uri}")
         
@@ -2,10 +2,93 @@ import boto3
 import json
 import os
 import re
-from datetime import datetime
+from botocore.config import Config
 
-s3 = boto3.client('s3')
+# Shared client configuration: keep connections alive between warm invocations,
+# fail fast on connect and use virtual-hosted style S3 addressing
+CLIENT_CONFIG = Config(
+    tcp_keepalive=True,
+    connect_timeout=3,
+    retries={'max_attempts': 3, 'mode': 'adaptive'},
+    s3={'addressing_style': 'virtual'}
+)
+
+s3 = boto3.client('s3', config=CLIENT_CONFIG)
 OUTPUT_BUCKET = os.environ.get('OUTPUT_BUCKET')
+# Set DEBUG_EVENT to log full incoming events
+DEBUG_EVENT = os.environ.get('DEBUG_EVENT')
+
+# Regex patterns compiled once at import time
+EPISODE_HEADER_PATTERN = re.compile(r'#\s*Episode\s+\d+:(.+?)(?:\n|$)', re.IGNORECASE)
+
+# Episode number patterns like "Episode X", "EP X", "#X" in priority order,
+# combined into a single alternation with one capturing group per pattern
+EPISODE_NUMBER_PATTERN = re.compile('|'.join([
+    r'(?:episode|ep)\.?\s*#?(\d+)',  # Episode 1, Ep. 1, EP #1
+    r'#(\d+)',                        # #1
+    r'^(\d+)\s*[-:–]',               # 1 - Title, 1: Title
+    r'\bPart\s+(\d+)\b'              # Part 1
+]), re.IGNORECASE)
+FILENAME_NUMBER_PATTERN = re.compile(r'(\d+)')
+FILM_PATTERN = re.compile(r'(?:film|movie|featured film)[:\s]+([^\n]+)', re.IGNORECASE)
+EPISODE_PREFIX_PATTERN = re.compile(r'^(?:Episode|Ep\.?)\s+\d+\s*[-:]\s*', re.IGNORECASE)
+
+def find_episode_number(episode_name, summary):
+    """
+    Find an episode number in the episode name or the start of the summary.
+    
+    Higher priority patterns win over lower priority ones, and for the same
+    pattern a match in the episode name wins over one in the summary.
+    
+    Args:
+        episode_name: Episode name extracted from the summary
+        summary: Full summary text
+        
+    Returns:
+        Episode number as a string, or None if no pattern matched
+    """
+    best_priority = None
+    episode_number = None
+    # Limit the summary search to its first 500 characters without slicing it
+    for text, endpos in ((episode_name, len(episode_name)), (summary, 500)):
+        for match in EPISODE_NUMBER_PATTERN.finditer(text, 0, endpos):
+            # The index of the group that matched is the pattern's priority
+            if best_priority is None or match.lastindex < best_priority:
+                best_priority = match.lastindex
+                episode_number = match.group(match.lastindex)
+        # Nothing in the summary can beat a top priority match in the name
+        if best_priority == 1:
+            break
+    return episode_number
+
+def sanitize_name(name):
+    """
+    Sanitize an episode name for use in a filename in a single pass.
+    
+    Colons become " -", and runs of whitespace, underscores and any other
+    characters outside word characters, "&" and "-" collapse into a single
+    space. Leading and trailing separators are dropped.
+    
+    Args:
+        name: Episode name to sanitize
+        
+    Returns:
+        Sanitized name
+    """
+    chars = []
+    pending_space = False
+    for ch in name:
+        if ch == ':':
+            pending_space = True
+            ch = '-'
+        elif not (ch.isalnum() or ch in '&-'):
+            pending_space = True
+            continue
+        if pending_space and chars:
+            chars.append(' ')
+        pending_space = False
+        chars.append(ch)
+    return ''.join(chars)
 
 def handler(event, context):
     """
@@ -18,11 +101,21 @@ def handler(event, context):
     Returns:
         Dictionary with status and output information
     """
-    print(f"Formatting output with event: {json.dumps(event)[:500]}...")
+    if DEBUG_EVENT:
+        print(f"Formatting output with event: {json.dumps(event)[:500]}...")
+    else:
+        print(f"Formatting output with event keys: {list(event.keys())}")
     
     summary = event.get('summary')
     metadata = event.get('metadata', {})
     
+    # Summaries too large for the Step Functions payload are passed by S3 location
+    summary_s3 = event.get('summary_s3')
+    if not summary and summary_s3:
+        print(f"Retrieving summary from S3: bucket={summary_s3['bucket']}, key={summary_s3['key']}")
+        response = s3.get_object(Bucket=summary_s3['bucket'], Key=summary_s3['key'])
+        summary = response['Body'].read().decode('utf-8')
+    
     if not summary:
         raise ValueError("No summary provided in the event")
     
@@ -36,7 +129,8 @@ def handler(event, context):
         
         # Try to extract episode name and number for use in the filename
         # Look for something that looks like a title at the beginning
-        lines = summary.split('\n')
+        # Only the first few lines are inspected, so stop splitting after 10
+        lines = summary.split('\n', 10)[:10]
         episode_name = "Podcast Summary"
         film_name = "Unknown Film"
         episode_number = None
@@ -49,7 +143,7 @@ def handler(event, context):
             print(f"Using first line as episode name: {episode_name}")
         else:
             # Try to find the episode name pattern in the header format: # Episode X: Film & Title
-            first_line_pattern = re.search(r'#\s*Episode\s+\d+:(.+?)(?:\n|$)', summary, re.IGNORECASE)
+            first_line_pattern = EPISODE_HEADER_PATTERN.search(summary)
             if first_line_pattern:
                 # Get the content after "Episode X:"
                 first_line_content = first_line_pattern.group(1).strip()
@@ -57,39 +151,21 @@ def handler(event, context):
                 print(f"Using header pattern match as episode name: {episode_name}")
             else:
                 # Fallback: look for non-header lines at the beginning (original method)
-                for line in lines[:10]:  # Check the first few lines
+                for line in lines:  # Check the first few lines
                     if line.strip() and not line.startswith('#') and len(line.strip()) < 100:
                         episode_name = line.strip()
                         print(f"Using fallback method for episode name: {episode_name}")
                         break
         
         # Look for episode number patterns in the summary or title
-        # Check for patterns like "Episode X", "EP X", "#X"
-        number_patterns = [
-            r'(?:episode|ep)\.?\s*#?(\d+)',  # Episode 1, Ep. 1, EP #1
-            r'#(\d+)',                        # #1
-            r'^(\d+)\s*[-:–]',               # 1 - Title, 1: Title
-            r'\bPart\s+(\d+)\b'              # Part 1
-        ]
-        
-        for pattern in number_patterns:
-            # Check in episode name first
-            match = re.search(pattern, episode_name, re.IGNORECASE)
-            if match:
-                episode_number = match.group(1).zfill(3)  # Pad with leading zeros to make it 3 digits
-                break
-                
-            # If not found in title, check first 500 chars of summary
-            if not episode_number:
-                match = re.search(pattern, summary[:500], re.IGNORECASE)
-                if match:
-                    episode_number = match.group(1).zfill(3)
-                    break
+        episode_number = find_episode_number(episode_name, summary)
+        if episode_number:
+            episode_number = episode_number.zfill(3)  # Pad with leading zeros to make it 3 digits
         
         # If episode number still not found, look for original filename pattern
         if not episode_number and 'originalFileName' in metadata:
             filename = metadata.get('originalFileName', '')
-            match = re.search(r'(\d+)', filename)
+            match = FILENAME_NUMBER_PATTERN.search(filename)
             if match:
                 episode_number = match.group(1).zfill(3)
         
@@ -98,7 +174,7 @@ def handler(event, context):
             episode_number = "000"
         
         # Try to find the film name (likely after "Film:" or similar text)
-        film_pattern = re.search(r'(?:film|movie|featured film)[:\s]+([^\n]+)', summary, re.IGNORECASE)
+        film_pattern = FILM_PATTERN.search(summary)
         if film_pattern:
             film_name = film_pattern.group(1).strip()
         
@@ -106,27 +182,23 @@ def handler(event, context):
         markdown = clean_summary
         
         # Clean the episode name by removing any "Episode X" prefix patterns
-        episode_name = re.sub(r'^(?:Episode|Ep\.?)\s+\d+\s*[-:]\s*', '', episode_name, flags=re.IGNORECASE)
+        episode_name = EPISODE_PREFIX_PATTERN.sub('', episode_name)
         print(f"Cleaned episode name: {episode_name}")
         
         # Generate the output filename (sanitize it but preserve spaces for readability)
-        # Replace colons with hyphens and other problematic characters with underscores
-        safe_name = episode_name.replace(':', ' -')
-        safe_name = re.sub(r'[^\w\s&-]', '_', safe_name)
-        # Replace multiple spaces/underscores with a single space
-        safe_name = re.sub(r'[\s_]+', ' ', safe_name)
-        # Strip leading/trailing spaces
-        safe_name = safe_name.strip()
+        safe_name = sanitize_name(episode_name)
         # Create output key with 3-digit episode number followed by sanitized name
         output_key = f"summaries/{episode_number} - {safe_name}.md"
         
-        # Write to S3
+        # Write to S3, encoding the body once up front
         print(f"Writing markdown to S3 bucket: {OUTPUT_BUCKET}, key: {output_key}")
+        body = markdown.encode('utf-8')
         s3.put_object(
             Bucket=OUTPUT_BUCKET,
             Key=output_key,
-            Body=markdown,
-            ContentType='text/markdown'
+            Body=body,
+            ContentType='text/markdown; charset=utf-8',
+            ContentLength=len(body)
         )
         
         print(f"Successfully wrote markdown file to S3: {output_key}")
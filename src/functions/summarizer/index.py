@@ -1,39 +1,196 @@
-import boto3
+import io
 import json
 import os
 import pathlib
+import botocore.session
+from botocore.config import Config
 
-s3 = boto3.client('s3')
-bedrock = boto3.client('bedrock-runtime')
+# Transcript extraction shared with the transcript processor (common Lambda layer)
+from bda_parse import extract_transcript, format_segments
+
+try:
+    # orjson (provided by the orjson Lambda layer) is much faster than json for
+    # the large transcript payloads; fall back to the standard library without it
+    import orjson
+    json_loads = orjson.loads
+    json_dumps_bytes = orjson.dumps
+except ImportError:
+    json_loads = json.loads
+    def json_dumps_bytes(obj):
+        return json.dumps(obj).encode('utf-8')
+
+try:
+    # ijson (provided by the ijson Lambda layer) decodes the segments at the start
+    # of a transcript read with a byte range; without it the full transcript is read
+    import ijson
+except ImportError:
+    ijson = None
+
+# Shared client configuration: keep connections alive between warm invocations,
+# fail fast on connect and allow long-running model responses
+CLIENT_CONFIG = Config(
+    tcp_keepalive=True,
+    connect_timeout=3,
+    read_timeout=300,
+    retries={'max_attempts': 3, 'mode': 'adaptive'}
+)
+
+# Create clients from a botocore session directly, skipping boto3's import
+# and resource machinery to reduce cold start time
+session = botocore.session.get_session()
+s3 = session.create_client('s3', config=CLIENT_CONFIG)
+bedrock = session.create_client('bedrock-runtime', config=CLIENT_CONFIG)
 MODEL_ID = os.environ.get('MODEL_ID', 'anthropic.claude-3-7-sonnet-20250219-v1:0')
+# Set DEBUG_EVENT to log full incoming events
+DEBUG_EVENT = os.environ.get('DEBUG_EVENT')
+
+# Path to the system prompt JSON file, next to this module
+PROMPT_FILE_PATH = os.path.join(pathlib.Path(__file__).parent.resolve(), 'custom-system-prompt.json')
+
+# Cache of (mtime in ns, system prompt) keyed by prompt file path, so warm
+# invocations only stat the file and pick up a changed prompt without a redeploy
+_system_prompt_cache = {}
 
 def load_system_prompt():
     """
-    Load system prompt from JSON file.
+    Load system prompt from JSON file, reusing the cached prompt while the
+    file's modification time is unchanged.
     
     Returns:
         String containing the system prompt
     """
     try:
-        # Get the directory of the current file
-        current_dir = pathlib.Path(__file__).parent.resolve()
-        # Path to the system prompt JSON file
-        prompt_file_path = os.path.join(current_dir, 'custom-system-prompt.json')
-        
         # Check if the file exists
-        if not os.path.exists(prompt_file_path):
-            print(f"Warning: System prompt file not found at: {prompt_file_path}")
+        try:
+            mtime = os.stat(PROMPT_FILE_PATH).st_mtime_ns
+        except FileNotFoundError:
+            print(f"Warning: System prompt file not found at: {PROMPT_FILE_PATH}")
             return None
+
+        cached = _system_prompt_cache.get(PROMPT_FILE_PATH)
+        if cached and cached[0] == mtime:
+            return cached[1]
             
         # Read and parse the JSON file
-        with open(prompt_file_path, 'r') as f:
+        with open(PROMPT_FILE_PATH, 'r') as f:
             prompt_data = json.load(f)
             
-        return prompt_data.get('systemPrompt')
+        system_prompt = prompt_data.get('systemPrompt')
+        _system_prompt_cache[PROMPT_FILE_PATH] = (mtime, system_prompt)
+        return system_prompt
     except Exception as e:
         print(f"Error loading system prompt: {str(e)}")
         return None
 
+# Maximum transcript length sent to the model, adjust based on model token limits
+MAX_TRANSCRIPT_LENGTH = 100000
+
+# Summaries larger than this are written to S3 instead of being returned inline,
+# leaving headroom under the 256KB Step Functions payload limit
+MAX_INLINE_SUMMARY_BYTES = 240 * 1024
+
+# Only the start of the transcript reaches the model, so only the first part of
+# the transcript object is read from S3 (covers ~100K characters of segments
+# plus the surrounding JSON structure)
+TRANSCRIPT_RANGE_BYTES = 512 * 1024
+
+# Location of the timestamped segments in the Bedrock Data Automation output
+SEGMENTS_PREFIX = 'standardOutput.audio.extraction.text.segments.item'
+
+# Default prompt used when the system prompt file cannot be loaded
+DEFAULT_SYSTEM_PROMPT = """The follow is a transcript of an audio podcast. The podcast is called Pop Culture Parenting, it is hosted by a Pediatrician (Dr Billy Garvey), and his friend (Nick) who is a parent to young children, but not formally qualified in this domain. Each episode they discuss a topic related to parenting in the context of a film. It has a preamble covering general topics and then provides specific, actionable parenting advice on a given topic. I'd like you to create a a number of outputs.
+
+1) The name of the episode.
+2) the film featured in the episode
+3) A short summary of the episode, this summary should begin with In this episode Billy and Nick discuss <Topic of episode>, in the context of <Film Name>
+4) a single page, easy to consume "cheat sheet" that summarises the advice in the podcast into actional insights, consumable at a glance.
+5) 5 search terms that can be used to find the episode. These shouldn't be generic to the podcast, only specific to the topic of the episode."""
+
+# The request for Claude 3.7 is identical across invocations apart from the
+# transcript, so serialize everything around it once (including the text of
+# the user message) and splice the JSON-escaped transcript in per request.
+# The transcript position is marked with a NUL character, escaped as \u0000
+USER_MESSAGE_PREFIX = "Here's the podcast transcript to analyze:\n\n"
+
+def build_request_template(system_prompt):
+    """
+    Serialize the Claude request with a placeholder for the transcript.
+    
+    Args:
+        system_prompt: System prompt to include in the request
+        
+    Returns:
+        Tuple of (prefix, suffix) bytes surrounding the transcript position
+    """
+    return tuple(json.dumps({
+        "anthropic_version": "bedrock-2023-05-31",
+        "max_tokens": 10000,
+        # Temperature and sampling params not compatible with thinking feature
+        #"temperature": 0.2,   # Lower temperature for more focused outputs
+        #"top_p": 0.95,        # Limit to the most probable tokens (95% cumulative probability)
+        #"top_k": 30,          # Limit to the top 30 most likely tokens
+        "system": system_prompt,  # System prompt as top-level parameter
+        "thinking": {
+            "type": "enabled", 
+            "budget_tokens": 4000  # Allocate tokens for reasoning process
+        },
+        "messages": [
+            {
+                "role": "user",
+                "content": USER_MESSAGE_PREFIX + "\x00"
+            }
+        ]
+    }).encode('utf-8').rsplit(b'\\u0000', 1))
+
+# System prompt the current request template was built from
+_request_template_prompt = None
+_request_template = None
+
+def get_request_template():
+    """
+    Get the serialized request template, rebuilding it only when the system
+    prompt has changed since it was last built.
+    
+    Returns:
+        Tuple of (prefix, suffix) bytes surrounding the transcript position
+    """
+    global _request_template_prompt, _request_template
+
+    system_prompt = load_system_prompt()
+    if not system_prompt:
+        print("Using default system prompt as loading from file failed")
+        system_prompt = DEFAULT_SYSTEM_PROMPT
+
+    if system_prompt != _request_template_prompt:
+        _request_template = build_request_template(system_prompt)
+        _request_template_prompt = system_prompt
+    return _request_template
+
+# Build the template during init so the first invocation reuses it
+get_request_template()
+
+# Pre-escaped notice appended inside the message when the transcript is truncated
+TRUNCATION_NOTICE = json.dumps("\n\n[Transcript truncated due to length]")[1:-1].encode('utf-8')
+
+def iter_leading_segments(data):
+    """
+    Decode the complete segments at the start of a truncated transcript document.
+    
+    Args:
+        data: Leading bytes of the transcript JSON
+        
+    Yields:
+        Each segment fully contained in data, in order
+    """
+    try:
+        for segment in ijson.items(io.BytesIO(data), SEGMENTS_PREFIX, use_float=True):
+            if not isinstance(segment, dict):
+                return
+            yield segment
+    except ijson.JSONError:
+        # The document was cut off by the byte range
+        return
+
 def handler(event, context):
     """
     Generate a summary of the podcast transcript using Claude 3.7.
@@ -45,7 +202,10 @@ def handler(event, context):
     Returns:
         Dictionary with summary and metadata
     """
-    print(f"Generating summary with event: {json.dumps(event)[:500]}...")
+    if DEBUG_EVENT:
+        print(f"Generating summary with event: {json.dumps(event)[:500]}...")
+    else:
+        print(f"Generating summary with event keys: {list(event.keys())}")
     
     # Get transcript location from event
     transcript_location = event.get('transcript_location', {})
@@ -57,109 +217,70 @@ def handler(event, context):
         raise ValueError(f"Missing transcript location information: bucket={bucket}, key={key}")
     
     try:
-        # Fetch the transcript from S3
+        # Fetch the start of the transcript from S3
         print(f"Retrieving transcript from S3: bucket={bucket}, key={key}")
-        response = s3.get_object(Bucket=bucket, Key=key)
-        transcript_data = json.loads(response['Body'].read().decode('utf-8'))
+        response = s3.get_object(Bucket=bucket, Key=key, Range=f"bytes=0-{TRANSCRIPT_RANGE_BYTES - 1}")
+        body = response['Body'].read()
+        object_size = int(response.get('ContentRange', f"/{len(body)}").rsplit('/', 1)[1])
         
-        # Process the transcript based on structure
         transcript = ""
+        if len(body) < object_size:
+            # Use the leading segments if they already fill the model input
+            if ijson:
+                transcript = format_segments(iter_leading_segments(body), MAX_TRANSCRIPT_LENGTH)
+            if len(transcript) <= MAX_TRANSCRIPT_LENGTH:
+                print(f"Leading segments too short ({len(transcript)} chars), retrieving full transcript")
+                transcript = ""
+                body = s3.get_object(Bucket=bucket, Key=key)['Body'].read()
         
-        # Try to extract transcript from the standardOutput format
-        if isinstance(transcript_data, dict) and 'standardOutput' in transcript_data:
-            std_output = transcript_data['standardOutput']
-            if 'audio' in std_output:
-                audio_data = std_output['audio']
-                if 'extraction' in audio_data and 'text' in audio_data['extraction']:
-                    text_data = audio_data['extraction']['text']
-                    if 'segments' in text_data:
-                        segments = text_data['segments']
-                        for segment in segments:
-                            start_time = segment.get('startTime', 0)
-                            text = segment.get('text', '')
-                            start_formatted = f"{int(start_time // 60):02d}:{int(start_time % 60):02d}"
-                            transcript += f"[{start_formatted}] {text}\n\n"
-                    elif 'content' in text_data:
-                        transcript = text_data['content']
-        
-        # If we couldn't find the transcript in the expected structure, try common patterns
-        if not transcript and isinstance(transcript_data, dict):
-            if 'text' in transcript_data:
-                transcript = transcript_data['text']
-            elif 'transcript' in transcript_data:
-                transcript = transcript_data['transcript']
-            elif 'content' in transcript_data:
-                transcript = transcript_data['content']
-        
-        # Last resort fallback
         if not transcript:
-            print("Could not find transcript in expected format, using raw JSON")
-            transcript = json.dumps(transcript_data, indent=2)
+            transcript = extract_transcript(json_loads(body), MAX_TRANSCRIPT_LENGTH)
+        del body
+        
+        # Fallback fields may hold non-string JSON values, which are sent as
+        # their string form; the transcript is escaped into the request as a string
+        transcript = str(transcript)
             
         print(f"Retrieved transcript with length: {len(transcript)}")
     except Exception as e:
         print(f"Error retrieving transcript from S3: {str(e)}")
         raise e
     
-    # Load system prompt from JSON file
-    system_prompt = load_system_prompt()
-    
-    # Fallback to default prompt if loading fails
-    if not system_prompt:
-        print("Using default system prompt as loading from file failed")
-        system_prompt = """The follow is a transcript of an audio podcast. The podcast is called Pop Culture Parenting, it is hosted by a Pediatrician (Dr Billy Garvey), and his friend (Nick) who is a parent to young children, but not formally qualified in this domain. Each episode they discuss a topic related to parenting in the context of a film. It has a preamble covering general topics and then provides specific, actionable parenting advice on a given topic. I'd like you to create a a number of outputs.
-
-1) The name of the episode.
-2) the film featured in the episode
-3) A short summary of the episode, this summary should begin with In this episode Billy and Nick discuss <Topic of episode>, in the context of <Film Name>
-4) a single page, easy to consume "cheat sheet" that summarises the advice in the podcast into actional insights, consumable at a glance.
-5) 5 search terms that can be used to find the episode. These shouldn't be generic to the podcast, only specific to the topic of the episode."""
-    
     # Format user message with transcript
     # If the transcript is very long, we might need to truncate it
-    max_transcript_length = 100000  # Adjust based on model token limits
-    truncated_transcript = transcript[:max_transcript_length]
-    if len(transcript) > max_transcript_length:
-        truncated_transcript += "\n\n[Transcript truncated due to length]"
+    is_truncated = len(transcript) > MAX_TRANSCRIPT_LENGTH
+    encoded_transcript = json_dumps_bytes(transcript[:MAX_TRANSCRIPT_LENGTH])
     
-    user_message = f"Here's the podcast transcript to analyze:\n\n{truncated_transcript}"
+    # Release the full transcript before the long-running model call
+    del transcript
     
-    # Create the request for Claude 3.7
-    request = {
-        "anthropic_version": "bedrock-2023-05-31",
-        "max_tokens": 10000,
-        # Temperature and sampling params not compatible with thinking feature
-        #"temperature": 0.2,   # Lower temperature for more focused outputs
-        #"top_p": 0.95,        # Limit to the most probable tokens (95% cumulative probability)
-        #"top_k": 30,          # Limit to the top 30 most likely tokens
-        "system": system_prompt,  # System prompt as top-level parameter
-        "thinking": {
-            "type": "enabled", 
-            "budget_tokens": 4000  # Allocate tokens for reasoning process
-        },
-        "messages": [
-            {
-                "role": "user",
-                "content": user_message
-            }
-        ]
-    }
+    # Build the request body for Claude 3.7 from the pre-serialized template
+    request_body_prefix, request_body_suffix = get_request_template()
+    request_body = b''.join((
+        request_body_prefix,
+        memoryview(encoded_transcript)[1:-1],  # Drop the surrounding quotes without copying
+        TRUNCATION_NOTICE if is_truncated else b'',
+        request_body_suffix
+    ))
+    del encoded_transcript
     
     try:
         print(f"Invoking Bedrock model: {MODEL_ID}")
         # Invoke Claude 3.7
         response = bedrock.invoke_model(
             modelId=MODEL_ID,
-            body=json.dumps(request)
+            body=request_body
         )
         
-        response_body = json.loads(response["body"].read())
+        response_body = json_loads(response["body"].read())
         
-        # Find the text content using next() - works regardless of position or thinking being enabled
-        text_item = next((item for item in response_body["content"] if item.get("type") == "text"), None)
-        if text_item and "text" in text_item:
-            summary = text_item["text"]
-        else:
+        # Find the text content - works regardless of position or thinking being enabled
+        summary = None
+        for item in response_body["content"]:
+            if item.get("type") == "text":
+                summary = item.get("text")
+                break
+        if summary is None:
             print(f"Error: Unable to find text content in response: {json.dumps(response_body)[:1000]}")
             raise ValueError("No text content found in the model response")
         
@@ -176,8 +297,28 @@ def handler(event, context):
                 essential_metadata["originalFileName"] = metadata["originalFileName"]
             # Add other essential metadata fields as needed
         
+        # A character is at most 4 bytes in UTF-8, so only encode when the summary could be too large
+        summary_s3 = None
+        if len(summary) * 4 > MAX_INLINE_SUMMARY_BYTES:
+            summary_bytes = summary.encode('utf-8')
+            if len(summary_bytes) > MAX_INLINE_SUMMARY_BYTES:
+                # Store the summary next to the transcript and return its location instead
+                summary_s3 = {
+                    "bucket": bucket,
+                    "key": f"{key.rsplit('/', 1)[0]}/summary.md"
+                }
+                print(f"Summary too large for Step Functions payload, writing to S3: {summary_s3}")
+                s3.put_object(
+                    Bucket=summary_s3["bucket"],
+                    Key=summary_s3["key"],
+                    Body=summary_bytes,
+                    ContentType='text/markdown; charset=utf-8'
+                )
+                summary = None
+        
         return {
             "summary": summary,
+            "summary_s3": summary_s3,
             "essential_metadata": essential_metadata
         }
         
@@ -1,11 +1,58 @@
-import boto3
 import json
 import os
-import re
-from datetime import datetime
+import time
+import botocore.session
+from botocore.config import Config
 
-s3 = boto3.client('s3')
+# Transcript extraction shared with the summarizer (common Lambda layer)
+from bda_parse import extract_transcript, format_segments
+
+try:
+    # orjson (provided by the orjson Lambda layer) is much faster than json for
+    # large transcripts; fall back to the standard library without it
+    import orjson
+    json_loads = orjson.loads
+except ImportError:
+    json_loads = json.loads
+
+try:
+    # ijson (provided by the ijson Lambda layer) streams the timestamped segments
+    # out of the transcript without holding the whole document in memory; without
+    # it the transcript is read and parsed in full
+    import ijson
+except ImportError:
+    ijson = None
+
+# Shared client configuration: keep connections alive between warm invocations
+# and fail fast on connect
+CLIENT_CONFIG = Config(
+    tcp_keepalive=True,
+    connect_timeout=3,
+    retries={'max_attempts': 3, 'mode': 'adaptive'}
+)
+
+# Create clients from a botocore session directly, skipping boto3's import
+# and resource machinery to reduce cold start time
+session = botocore.session.get_session()
+s3 = session.create_client('s3', config=CLIENT_CONFIG)
 TRANSCRIPTS_BUCKET = os.environ.get('TRANSCRIPTS_BUCKET')
+# Set DEBUG_EVENT to log full incoming events
+DEBUG_EVENT = os.environ.get('DEBUG_EVENT')
+
+# Location of the timestamped segments in the Bedrock Data Automation output
+SEGMENTS_PREFIX = 'standardOutput.audio.extraction.text.segments.item'
+
+def stream_segments(body):
+    """
+    Format the timestamped segments of a BDA transcript as it is read from S3.
+    
+    Args:
+        body: Streaming body of the transcript object
+        
+    Returns:
+        String containing the formatted transcript, empty if there are no segments
+    """
+    return format_segments(ijson.items(body, SEGMENTS_PREFIX, use_float=True))
 
 def handler(event, context):
     """
@@ -18,7 +65,10 @@ def handler(event, context):
     Returns:
         Dictionary with processed transcript and metadata
     """
-    print(f"Processing transcript with event: {json.dumps(event)}")
+    if DEBUG_EVENT:
+        print(f"Processing transcript with event: {json.dumps(event)}")
+    else:
+        print(f"Processing transcript with event keys: {list(event.keys())}")
     
     # Get the transcript information from the event
     transcript_bucket = event.get('TranscriptionStatus', {}).get('OutputBucket')
@@ -36,61 +86,31 @@ def handler(event, context):
             Key=transcript_key
         )
         
-        transcript_data = json.loads(response['Body'].read().decode('utf-8'))
-        print(f"Retrieved transcript data with keys: {list(transcript_data.keys()) if isinstance(transcript_data, dict) else 'Not a dictionary'}")
-        
-        # Process the transcript based on Bedrock Data Automation format
         full_transcript = ""
+        if ijson:
+            # Stream the segments, the usual BDA output, without materializing the document
+            full_transcript = stream_segments(response['Body'])
         
-        # The Bedrock Data Automation output format should contain a standardOutput section
-        if isinstance(transcript_data, dict) and 'standardOutput' in transcript_data:
-            std_output = transcript_data['standardOutput']
-            
-            # For audio transcription, look for the text extraction in the audio section
-            if 'audio' in std_output:
-                audio_data = std_output['audio']
-                
-                # Check if there's an extraction section with text
-                if 'extraction' in audio_data and 'text' in audio_data['extraction']:
-                    text_data = audio_data['extraction']['text']
-                    
-                    # If there are segments with timestamps
-                    if 'segments' in text_data:
-                        segments = text_data['segments']
-                        for segment in segments:
-                            start_time = segment.get('startTime', 0)
-                            end_time = segment.get('endTime', 0)
-                            text = segment.get('text', '')
-                            
-                            # Format timestamp as [MM:SS]
-                            start_formatted = f"{int(start_time // 60):02d}:{int(start_time % 60):02d}"
-                            
-                            full_transcript += f"[{start_formatted}] {text}\n\n"
-                    
-                    # If there's a full transcript 
-                    elif 'content' in text_data:
-                        full_transcript = text_data['content']
-        
-        # If we couldn't find the transcript in the expected structure, try common patterns
-        if not full_transcript and isinstance(transcript_data, dict):
-            # Try to find any text content at various locations
-            if 'text' in transcript_data:
-                full_transcript = transcript_data['text']
-            elif 'transcript' in transcript_data:
-                full_transcript = transcript_data['transcript']
-            elif 'content' in transcript_data:
-                full_transcript = transcript_data['content']
-        
-        # Last resort fallback
-        if not full_transcript:
-            print("Could not find transcript in expected format, using raw JSON")
-            full_transcript = json.dumps(transcript_data, indent=2)
-            print(f"Using raw transcript data as fallback: {full_transcript[:100]}...")
+        if full_transcript:
+            print("Built transcript from streamed segments")
+        else:
+            if ijson:
+                # No segments in the stream, fetch the document again to look elsewhere
+                response = s3.get_object(
+                    Bucket=transcript_bucket,
+                    Key=transcript_key
+                )
+            transcript_data = json_loads(response['Body'].read())
+            if isinstance(transcript_data, dict):
+                print(f"Retrieved transcript data with keys: {list(transcript_data.keys())}")
+            else:
+                print("Retrieved transcript data with keys: Not a dictionary")
+            full_transcript = extract_transcript(transcript_data)
         
         # Extract basic metadata
         metadata = {
             'originalFileName': original_file_name,
-            'processingTimestamp': datetime.now().isoformat(),
+            'processingTimestamp': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
             'transcriptLength': len(full_transcript),
             'transcriptSource': f"s3://{transcript_bucket}/{transcript_key}"
         }